@@ -69,21 +69,41 @@ long as it is already in the pmgr).
 """
 
 import argparse
+import re
 from sys import argv
 from pprint import pprint
-from os import system
 from docopt import docopt
 from sys import exit
 from difflib import get_close_matches
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import sys
+import os
+import threading
+
+import pyca
+try:
+    from rapidfuzz import process, fuzz
+except ImportError:
+    process = None
 
-import psp.Pv as pv
 
 from . import utilsPlus as utlp
 
 allHutches = set(["sxr", "amo", "xpp", "cxi", "xcs", "mfx", "mec", "det", "usr"])
 
+def closestMatches(name, choices, n=10):
+    """
+    Returns up to n of the choices that most closely match name, using
+    rapidfuzz when it is installed and difflib otherwise.
+    """
+    if process is not None:
+        return [match[0] for match in process.extract(
+            name, choices, scorer=fuzz.WRatio, limit=n, score_cutoff=10)]
+    return get_close_matches(name, choices, n, 0.1)
+
 def saveConfig(PV, hutch, pmgr, SN, verbose, zenity, dumb=False, 
-                dumb_cfg=None, dumb_confirm=True, rename=True):
+                dumb_cfg=None, dumb_confirm=True, rename=True, liveVals=None):
     """
     Searches for the SN of the PV and then saves the live configuration values
     to the pmgr. 
@@ -94,82 +114,90 @@ def saveConfig(PV, hutch, pmgr, SN, verbose, zenity, dumb=False,
     
     If a hutch is specified, the function will save the motor obj and cfg to the
     pmgr of that hutch. Otherwise it will save to the hutch listed on the PV.
+
+    liveVals are the live PV values from utlp.getLiveVals, if already read.
+    Returns True if the motor was saved.
     """
     print("Saving motor info to {0} pmgr".format(hutch.upper()))
-    # Grab motor information and configuration
-    cfgDict = utlp.getCfgVals(pmgr, PV, rename)
-    objDict = utlp.getObjVals(pmgr, PV, rename)
+    # Grab motor information and configuration in one batch of reads
+    if liveVals is None: liveVals = utlp.getLiveVals(pmgr, PV)
+    cfgDict = utlp.getCfgVals(pmgr, PV, rename, liveVals)
+    objDict = utlp.getObjVals(pmgr, PV, rename, liveVals)
     allNames = utlp.allCfgNames(pmgr)
 
     if rename:
         name = objDict["name"]
     else:
-        name = pv.get(PV +".DESC")
+        name = liveVals[".DESC"]
     
-    # Look through pmgr objs for a motor with that id
-    if verbose:
-        print("Checking {0} pmgr SNs for this motor".format(hutch.upper()))
-    objID = utlp.getObjWithSN(pmgr, objDict["FLD_SN"], verbose)
-    if verbose:
-        print("ObjID obtained from {0} pmgr: {1}".format(hutch.upper(), objID))
-
-    # If an objID was found, update the obj
-    if objID: 
-        print("Saving motor information...")
-        utlp.objUpdate(pmgr, objID, objDict)
-        if verbose: print("\nMotor SN found in {0} pmgr, motor information \
+    # Create or update the obj and cfg, only refreshing the tables when needed
+    objOld = cfgOld = None
+    with utlp.batched_updates(pmgr):
+        # Look through pmgr objs for a motor with that id
+        if verbose:
+            print("Checking {0} pmgr SNs for this motor".format(hutch.upper()))
+        objID = utlp.getObjWithSN(pmgr, objDict["FLD_SN"], verbose)
+        if verbose:
+            print("ObjID obtained from {0} pmgr: {1}".format(hutch.upper(), objID))
+
+        # If an objID was found, update the obj
+        if objID: 
+            print("Saving motor information...")
+            utlp.objUpdate(pmgr, objID, objDict)
+            if verbose: print("\nMotor SN found in {0} pmgr, motor information \
 updated".format(hutch.upper()))
-    # Else try to create a new obj
-    else:
-        print("\nSN {0} not found in pmgr, adding new motor obj...".format(SN))
-        # Name availability check
-        try:
-            objDict["name"] = utlp.nextObjName(pmgr, objDict["name"])
-        except KeyError:
-            objDict["name"] = utlp.nextObjName(pmgr, pv.get(PV +".DESC"))
-        # Create new obj
-        objID = utlp.newObject(pmgr, objDict)
-        if not objID:
-            print("Failed to create obj for {0}".format(objDict["name"]))
-            if zenity:
-                system("zenity --error --text='Error: Failed to create new \
-object for {0} pmgr'".format(hutch.upper()))
-            return 
-
-    # Try to get the cfg id the obj uses
-    try: 
-        cfgID = pmgr.objs[objID]["config"]
-    except Exception as e: 
-        cfgID = None
-
-    # If there was a valid cfgID and it isnt the default one, try to update the cfg
-    if cfgID and pmgr.cfgs[cfgID]["name"].upper() != hutch.upper():
-        didWork, objOld, cfgOld = utlp.updateConfig(
-            PV, pmgr, objID, cfgID, objDict, cfgDict, allNames, verbose, rename)
-        if not didWork:
-            print("Failed to update the cfg with new values")
-            if zenity: 
-                system("zenity --error --text='Error: Failed to update config'")
-            return
-    # Else create a new configuration and try to set it to the objID
-    else:
-        print("\nInvalid config associated with motor {0}. Adding new \
+        # Else try to create a new obj
+        else:
+            print("\nSN {0} not found in pmgr, adding new motor obj...".format(SN))
+            # Name availability check
+            try:
+                objDict["name"] = utlp.nextObjName(pmgr, objDict["name"])
+            except KeyError:
+                objDict["name"] = utlp.nextObjName(pmgr, liveVals[".DESC"])
+            # Create new obj
+            objID = utlp.newObject(pmgr, objDict)
+            utlp.refreshTables(pmgr, pmgr.DB_OBJECT)
+            if not objID:
+                print("Failed to create obj for {0}".format(objDict["name"]))
+                if zenity:
+                    utlp.zenityError("Error: Failed to create new object for "
+                                     "{0} pmgr".format(hutch.upper()))
+                return 
+
+        # Try to get the cfg id the obj uses
+        try: 
+            cfgID = pmgr.objs[objID]["config"]
+        except Exception as e: 
+            cfgID = None
+
+        # If there was a valid cfgID and it isnt the default one, try to update the cfg
+        if cfgID and pmgr.cfgs[cfgID]["name"].upper() != hutch.upper():
+            didWork, objOld, cfgOld = utlp.updateConfig(
+                PV, pmgr, objID, cfgID, objDict, cfgDict, allNames, verbose, rename)
+            if not didWork:
+                print("Failed to update the cfg with new values")
+                if zenity: 
+                    utlp.zenityError("Error: Failed to update config")
+                return
+        # Else create a new configuration and try to set it to the objID
+        else:
+            print("\nInvalid config associated with motor {0}. Adding new \
 config.".format(SN))
-        status = utlp.getAndSetConfig(PV, pmgr, objID, objDict, cfgDict)
-        if not status:
-            print("Motor '{0}' failed to be added to pmgr".format(name))
-            return 
-        print("Motor '{0}' successfully added to pmgr".format(name))
-
-    pmgr.updateTables()
-    # Change the config and object names to be the motor description
-    if rename:
-        obj = pmgr.objs[objID]
-        cfg = pmgr.cfgs[obj["config"]]
-        obj["name"] = utlp.nextObjName(pmgr, obj["FLD_DESC"])
-        cfg["name"] = utlp.nextCfgName(pmgr, obj["FLD_DESC"])
-        utlp.transaction(pmgr, "objectChange", objID, obj)
-        utlp.transaction(pmgr, "configChange", cfgID, cfg)
+            status = utlp.getAndSetConfig(PV, pmgr, objID, objDict, cfgDict)
+            if not status:
+                print("Motor '{0}' failed to be added to pmgr".format(name))
+                return 
+            print("Motor '{0}' successfully added to pmgr".format(name))
+
+        utlp.refreshTables(pmgr)
+        # Change the config and object names to be the motor description
+        if rename:
+            obj = pmgr.objs[objID]
+            cfg = pmgr.cfgs[obj["config"]]
+            obj["name"] = utlp.nextObjName(pmgr, obj["FLD_DESC"])
+            cfg["name"] = utlp.nextCfgName(pmgr, obj["FLD_DESC"])
+            utlp.transaction(pmgr, "objectChange", objID, obj)
+            utlp.transaction(pmgr, "configChange", cfgID, cfg)
     
     print("\nSuccessfully saved motor info and configuration into {0} \
 pmgr".format(hutch))
@@ -177,10 +205,11 @@ pmgr".format(hutch))
     if cfgID and objID:
         cfgPmgr = pmgr.cfgs[cfgID]
         objPmgr = pmgr.objs[objID]
-        try: utlp.printDiff(pmgr, objOld, cfgOld, objPmgr, cfgPmgr, verbose)
-        except: pass
-        if zenity: system('zenity --info --text="Motor configuration \
-successfully saved into {0} pmgr"'.format(hutch.upper()))
+        if objOld is not None:
+            try: utlp.printDiff(pmgr, objOld, cfgOld, objPmgr, cfgPmgr, verbose)
+            except (KeyError, AttributeError, TypeError): pass
+        return True
+    return False
 
 def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False, 
                 dumb_cfg=None, dumb_confirm=True, name=None):
@@ -201,7 +230,7 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
     # # PV value associated with that motor at the moment
     # Change rec_base field to the base PV and the port field to the live port
     obj = pmgr.objs[objID]
-    port = pv.get(PV + ".PORT")
+    port = utlp.batchGet(PV, [".PORT"])[".PORT"]
     if obj["rec_base"] != PV or obj["FLD_PORT"] != port:
         obj["rec_base"] = PV
         obj["FLD_PORT"] = port
@@ -223,6 +252,7 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
             pmgr = utlp.getPmgr(objType, hutch, verbose)
             names = utlp.allCfgNames(pmgr)
             for name in names: allNames[name] = hutch
+        choices = list(allNames.keys())
 
         # Make sure the user inputs a correct configuration
         cfgName = dumb_cfg
@@ -231,7 +261,7 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
             while(confirm[0].lower() != "y"):
                 if cfgName is not None:
                     print("Closest matches to your input:")
-                    closest_cfgs = get_close_matches(cfgName, allNames.keys(), 10, 0.1)
+                    closest_cfgs = closestMatches(cfgName, choices)
                     pprint(closest_cfgs)
                 cfgName = raw_input("Please input a configuration to apply or search: (or 'quit' to quit)\n")
                 if cfgName == 'quit':
@@ -249,7 +279,7 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
         cfgID = utlp.cfgFromName(pmgr, cfgName)
         if not cfgID:
             print("Error when getting config ID from name: {0}".format(cfgName))
-            if zenity: system("zenity --error --text='Error: Failed to get cfgID'")
+            if zenity: utlp.zenityError("Error: Failed to get cfgID")
             return
 
         # Set configuration of dumb motor pmgr object
@@ -260,7 +290,7 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
             obj = pmgr.objs[objID]
             if not status:
                 print("Failed set cfg to object")
-                if zenity: system("zenity --error --text='Error: Failed to set cfgID to object'")
+                if zenity: utlp.zenityError("Error: Failed to set cfgID to object")
                 return
 
         # Set the obj name and desc to use the cfg name (only for dumb motors)
@@ -272,8 +302,9 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
             obj = pmgr.objs[objID]
 
     # For future diff comparison
-    cfgOld = utlp.getCfgVals(pmgr, PV)
-    objOld = utlp.getObjVals(pmgr, PV)
+    liveVals = utlp.getLiveVals(pmgr, PV)
+    cfgOld = utlp.getCfgVals(pmgr, PV, vals=liveVals)
+    objOld = utlp.getObjVals(pmgr, PV, vals=liveVals)
 
     # Apply the pmgr configuration to the motor
     print("Applying configuration, please wait...")
@@ -282,17 +313,19 @@ def applyConfig(PV, hutches, objType, SN, verbose, zenity, dumb=False,
     if not status:
         print("Failed to apply: pmgr transaction failure")
         if zenity: 
-            system("zenity --error --text='Error: pmgr transaction failure'")
+            utlp.zenityError("Error: pmgr transaction failure")
         return
     print("Successfully completed apply")
 
-    # Try to print the diffs
-    cfgNew = utlp.getCfgVals(pmgr, PV)
-    objNew = utlp.getObjVals(pmgr, PV)
+    # Try to print the diffs, rereading the motor now that it has changed
+    utlp.clearLiveCache(PV)
+    liveVals = utlp.getLiveVals(pmgr, PV)
+    cfgNew = utlp.getCfgVals(pmgr, PV, vals=liveVals)
+    objNew = utlp.getObjVals(pmgr, PV, vals=liveVals)
     try: utlp.printDiff(pmgr, objOld, cfgOld, objNew, cfgNew, verbose,
                         kind='changes')
-    except: pass
-    if zenity: system('zenity --info --text="Configuration successfully applied"')
+    except (KeyError, AttributeError, TypeError): pass
+    if zenity: utlp.zenityInfo("Configuration successfully applied")
 
 def dumbMotorApply(PV, hutches, objType, SN, verbose, zenity):
     """
@@ -318,109 +351,123 @@ def importConfigs(hutch, pmgr, path, update = False, verbose = False):
 
     if verbose: print("Creating motor DB")
     old_cfg_paths = utlp.createmotordb(hutch, path)
-    pmgr_SNs = utlp.get_all_SN(pmgr)
+    # Read the names and SNs once and keep them current as motors are added
+    pmgr_SNs = set(utlp.get_all_SN(pmgr))
+    allNames = utlp.allCfgNames(pmgr)
 
-    for motor in old_cfg_paths.keys():
-        allNames = utlp.allCfgNames(pmgr)
-        cfgDict = utlp.getImportFieldDict(old_cfg_paths[motor])
-        objDict = utlp.getImportFieldDict(old_cfg_paths[motor])
-        dumb = True
-        pmgr.updateTables()
-        name = None
-        if cfgDict["FLD_DESC"]:
-            name = cfgDict["FLD_DESC"]
-        elif cfgDict["FLD_SN"]:
-            name = "SN:{0}".format(cfgDict["FLD_SN"])
-        else:
-            name = "Unknown"
-        # Pad SN with zeros if necessary
-        cfgDict = utlp.checkSNLength(cfgDict, pmgr)
-        objDict = utlp.checkSNLength(objDict, pmgr)
-
-        if dumb:
-            if verbose: print("\nDumb motor PN found. Using config only")
-            if name in allNames:
-                if verbose: print("Config '{0}' already in pmgr".format(name))
+    # Read the files in inode order, which usually follows their layout on disk
+    motors = sorted(old_cfg_paths.keys(),
+                    key=lambda motor: os.stat(old_cfg_paths[motor]).st_ino)
+
+    # Refresh the pmgr tables once for the whole import rather than after
+    # every change
+    with utlp.batched_updates(pmgr):
+        for motor in motors:
+            cfgDict = utlp.getImportFieldDict(old_cfg_paths[motor])
+            objDict = cfgDict.copy()
+            dumb = True
+            name = None
+            if cfgDict["FLD_DESC"]:
+                name = cfgDict["FLD_DESC"]
+            elif cfgDict["FLD_SN"]:
+                name = "SN:{0}".format(cfgDict["FLD_SN"])
+            else:
+                name = "Unknown"
+            # Pad SN with zeros if necessary
+            cfgDict = utlp.checkSNLength(cfgDict, pmgr)
+            objDict = utlp.checkSNLength(objDict, pmgr)
+
+            if dumb:
+                if verbose: print("\nDumb motor PN found. Using config only")
+                if name in allNames:
+                    if verbose: print("Config '{0}' already in pmgr".format(name))
+                    if not update:
+                        if verbose: print("    Skipping motor")
+                        continue
+                    if verbose: print("    Updating config fields")
+                    cfgID = utlp.cfgFromName(pmgr, name)
+                    if cfgID is None:
+                        # Added earlier in this import, so reread the cfgs
+                        utlp.refreshTables(pmgr, pmgr.DB_CONFIG)
+                        cfgID = utlp.cfgFromName(pmgr, name)
+                    error = utlp.cfgUpdate(pmgr, cfgID, cfgDict)
+                    if not error:
+                        print  ("        Completed update")
+                    else: print("        Failed to update the cfg with new values")
+                else:
+                    if verbose: print("Adding config '{0}' to pmgr".format(name))
+                    cfgID = utlp.newConfig(pmgr, cfgDict, cfgDict["FLD_DESC"])
+                    if cfgID is not None:
+                        allNames.add(cfgDict["name"])
+                        print("Config '{0}' successfully added to pmgr".format(
+                            cfgDict["FLD_DESC"]))
+                    else: 
+                        print("Config '{0}' failed to be added to pmgr".format(
+                            cfgDict["FLD_DESC"]))
+                continue                    
+
+            # Check if the serial number is already in the pmgr
+            if str(cfgDict["FLD_SN"]) in pmgr_SNs:
+                if verbose: print("\nMotor '{0}' already in pmgr".format(name))
+                # Skip the motor if update is False
                 if not update:
                     if verbose: print("    Skipping motor")
                     continue
-                if verbose: print("    Updating config fields")
-                cfgID = utlp.cfgFromName(pmgr, name)
-                error = utlp.cfgUpdate(pmgr, cfgID, cfgDict)
-                if not error:
-                    print  ("        Completed update")
-                else: print("        Failed to update the cfg with new values")
-            else:
-                if verbose: print("Adding config '{0}' to pmgr".format(name))
-                cfgID = utlp.newConfig(pmgr, cfgDict, cfgDict["FLD_DESC"])
-                if cfgID is not None:
-                    print("Config '{0}' successfully added to pmgr".format(
-                        cfgDict["FLD_DESC"]))
-                else: 
-                    print("Config '{0}' failed to be added to pmgr".format(
-                        cfgDict["FLD_DESC"]))
-            pmgr.updateTables()
-            continue                    
-
-        # Check if the serial number is already in the pmgr
-        if str(cfgDict["FLD_SN"]) in pmgr_SNs:
-            if verbose: print("\nMotor '{0}' already in pmgr".format(name))
-            # Skip the motor if update is False
-            if not update:
-                if verbose: print("    Skipping motor")
+                if verbose: print("    Updating motor fields")
+                objID = utlp.getObjWithSN(pmgr, cfgDict["FLD_SN"], verbose)
+                utlp.objUpdate(pmgr, objID, objDict)
+                cfgID = pmgr.objs[objID]["config"]
+                if cfgID and pmgr.cfgs[cfgID]["name"] != hutch.upper():
+                    oldName = pmgr.cfgs[cfgID]["name"]
+                    allNames.discard(oldName)
+                    cfgDict["FLD_TYPE"] = pmgr.cfgs[cfgID]["FLD_TYPE"]
+                    cfgDict["name"] = utlp.incrementMatching(str(name), 
+                                                             allNames,  
+                                                             maxLength=42)
+                    didWork = utlp.cfgChange(pmgr, cfgID, cfgDict)
+                    allNames.add(cfgDict["name"] if didWork else oldName)
+                    if verbose: 
+                        if didWork: print("        Completed update")
+                        else: print("        Failed to update the cfg with new values")
                 continue
-            if verbose: print("    Updating motor fields")
-            objID = utlp.getObjWithSN(pmgr, cfgDict["FLD_SN"], verbose)
-            utlp.objUpdate(pmgr, objID, objDict)
-            cfgID = pmgr.objs[objID]["config"]
-            if cfgID and pmgr.cfgs[cfgID]["name"] != hutch.upper():
-                if cfgDict["FLD_DESC"] in allNames: allNames.remove(cfgDict["FLD_DESC"])
-                cfgDict["FLD_TYPE"] = pmgr.cfgs[cfgID]["FLD_TYPE"]
-                cfgDict["name"] = utlp.incrementMatching(str(name), 
-                                                         allNames,  
-                                                         maxLength=42)
-                allNames.add(cfgDict["name"])
-                # print("test")
-                didWork = utlp.cfgChange(pmgr, cfgID, cfgDict)
-                if verbose: 
-                    if didWork: print("        Completed update")
-                    else: print("        Failed to update the cfg with new values")
-            continue
 
-        # Add a new obj and set it to use the cfg
-        try:
-            # Create a unique name for the config and then add the new config
-            cfgDict["name"] = utlp.nextCfgName(pmgr, name)
-            cfgID = utlp.newConfig(pmgr, cfgDict, cfgDict["name"])
-            pmgr.updateTables()
-            # Create a unique name for the obj and then add it
-            objDict["name"] = utlp.nextObjName(pmgr, name)
-            ObjID = utlp.newObject(pmgr, objDict)
-            pmgr.updateTables()
-            # Set the obj to use the cfg settings
-            status = False            
-            status = utlp.setObjCfg(pmgr, ObjID, cfgID)
-            if verbose:
-                if status: 
-                    print("Motor '{0}' successfully added to pmgr".format(
-                        objDict["name"]))
-                else: 
+            # Add a new obj and set it to use the cfg
+            try:
+                # Create a unique name for the config and then add the new config
+                cfgDict["name"] = utlp.incrementMatching(
+                    str(name), allNames, maxLength=utlp.maxLenName)
+                cfgID = utlp.newConfig(pmgr, cfgDict, cfgDict["name"])
+                if cfgID is not None: allNames.add(cfgDict["name"])
+                # Create a unique name for the obj and then add it
+                objDict["name"] = utlp.nextObjName(pmgr, name)
+                ObjID = utlp.newObject(pmgr, objDict)
+                utlp.refreshTables(pmgr, pmgr.DB_OBJECT)
+                # Set the obj to use the cfg settings
+                status = False            
+                status = utlp.setObjCfg(pmgr, ObjID, cfgID)
+                if status: pmgr_SNs.add(str(cfgDict["FLD_SN"]))
+                if verbose:
+                    if status: 
+                        print("Motor '{0}' successfully added to pmgr".format(
+                            objDict["name"]))
+                    else: 
+                        print("Motor '{0}' failed to be added to pmgr".format(
+                            objDict["name"]))
+            except:
+                if verbose:
                     print("Motor '{0}' failed to be added to pmgr".format(
                         objDict["name"]))
-        except:
-            if verbose:
-                print("Motor '{0}' failed to be added to pmgr".format(
-                    objDict["name"]))
-            continue
+                continue
 
-def Diff(PV, hutch, pmgr, SN, verbose):
+def Diff(PV, hutch, pmgr, SN, verbose, liveVals=None):
     """ 
     Prints the differences between the live values and the values saved in the
-    pmgr.
+    pmgr. liveVals are used the same way as in saveConfig.
     """
     # Get live configuration
-    cfgLive = utlp.getCfgVals(pmgr, PV, rename=False)
-    objLive = utlp.getObjVals(pmgr, PV, rename=False)
+    if liveVals is None: liveVals = utlp.getLiveVals(pmgr, PV)
+    cfgLive = utlp.getCfgVals(pmgr, PV, rename=False, vals=liveVals)
+    objLive = utlp.getObjVals(pmgr, PV, rename=False, vals=liveVals)
     # Look through pmgr objs for a motor with that SN
     if verbose: 
         print("Checking {0} pmgr SNs for this motor".format(hutch.upper()))
@@ -429,7 +476,7 @@ def Diff(PV, hutch, pmgr, SN, verbose):
         print("\nSN {0} not found in pmgr, cannot find diffs".format(SN))
         return
     try: cfgID = pmgr.objs[objID]["config"]
-    except: cfgID = None
+    except KeyError: cfgID = None
     if not cfgID:
         print("\nInvalid config associated with motor, cannot find diffs".format(SN))
         return
@@ -442,38 +489,92 @@ def Diff(PV, hutch, pmgr, SN, verbose):
     
     try: utlp.printDiff(pmgr, objLive, cfgLive, objPmgr, cfgPmgr, verbose, 
                         name1 = "Pmgr", name2 = "Live") 
-    except: pass
+    except (KeyError, AttributeError, TypeError): pass
         
+class _ThreadOutput(object):
+    """
+    Stand-in for sys.stdout that sends what each forEachHutch worker prints to
+    a buffer of its own, and everything else to the real stream.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        getattr(self.local, "buf", self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def forEachHutch(func, hutches):
+    """
+    Calls func(hutch) for every hutch, each in its own thread since the work
+    is almost all waiting on that hutch's pmgr database. What each call prints
+    is held back and written out in hutch order, each as soon as it and the
+    hutches before it are done, so the output of different hutches does not
+    interleave. Returns the results in the same order as hutches.
+    """
+    hutches = list(hutches)
+    if len(hutches) < 2:
+        return [func(hutch) for hutch in hutches]
+
+    out = _ThreadOutput(sys.stdout)
+    buffers = dict((hutch, StringIO()) for hutch in hutches)
+
+    def run(hutch):
+        pyca.attach_context()             # Share the main thread's CA context
+        out.local.buf = buffers[hutch]
+        return func(hutch)
+
+    def release(hutch):
+        out.stream.write(buffers.pop(hutch).getvalue())
+        out.stream.flush()
+
+    results = []
+    sys.stdout = out
+    try:
+        with ThreadPoolExecutor(max_workers=len(hutches)) as ex:
+            futures = [ex.submit(run, hutch) for hutch in hutches]
+            for hutch, future in zip(hutches, futures):
+                try:
+                    results.append(future.result())
+                finally:
+                    release(hutch)
+    finally:
+        sys.stdout = out.stream
+        for hutch in hutches:
+            if hutch in buffers: release(hutch)
+    return results
+
+# A range of motor numbers, e.g. "SXR:EXP:MMS:01-05" or "14-16", and a
+# single motor number, e.g. "10".  Only ASCII digits, which int() accepts.
+rangeArg = re.compile(r'^(.*?)([0-9]{1,2})-([0-9]+)$')
+numberArg = re.compile(r'^[0-9]{1,2}$')
+
 def parsePVArguments(PVArguments):
     """
     Parses PV input arguments and returns a set of motor PVs that will have
     the pmgrUtil functions applied to.
     """
-    
-    PVs = set()
     if len(PVArguments) == 0: return None
     basePV = utlp.getBasePV(PVArguments)
     if not basePV: return None
+    PVs = set()
     for arg in PVArguments:
-        try:
-            if '-' in arg:
-                splitArgs = arg.split('-')
-                if utlp.getBasePV(splitArgs[0]) == basePV: PVs.add(splitArgs[0])
-                start = int(splitArgs[0][-2:])
-                end = int(splitArgs[1])
-                while start <= end:
-                    PVs.add(basePV + "{:02}".format(start))
-                    start += 1
-            elif len(arg) > 3:
-                if utlp.getBasePV(arg) == basePV: PVs.add(arg)
-            elif len(arg) < 3:
-                PVs.add(basePV + "{:02}".format(int(arg)))
-            else: pass
-        except: pass
-        
-    PVs = list(PVs)
-    PVs.sort()
-    return PVs
+        match = rangeArg.match(arg)
+        if match:
+            # The range covers its first motor, so it is not added separately
+            start = int(match.group(2))
+            end = int(match.group(3))
+            PVs.update("{0}{1:02}".format(basePV, n)
+                       for n in range(start, end + 1))
+        elif '-' in arg: pass
+        elif len(arg) > 3:
+            if utlp.getBasePV(arg) == basePV: PVs.add(arg)
+        elif numberArg.match(arg):
+            PVs.add(basePV + "{:02}".format(int(arg)))
+
+    return sorted(PVs)
                                                                   
 ################################################################################
 ##                                   Main                                     ##
@@ -524,14 +625,9 @@ def main():
 
     # Try import first
     if arguments["import"]:
-        # A hack to get the appropriate hutch list and hutch path without 
-        # rewriting any new functions. The logic is pretty ugly so it would be
-        # nice to redo at some point.
-        hutches, objType, _ = utlp.motorPrelimChecks(
-            hutchPaths, hutches, objType, verbose)
-
-        hutchPaths, objType, _ = utlp.motorPrelimChecks(
-            hutchPaths, hutchPaths, objType, verbose)
+        # Check the hutch list and the hutch paths in one pass
+        hutches, hutchPaths, objType, _ = utlp.motorPrelimChecks(
+            hutchPaths, hutches, hutchPaths, objType, verbose)
         # objType = "ims_motor"
         for hutchPath in hutchPaths:
             for hutch in hutches:
@@ -554,12 +650,12 @@ def main():
         # Loop through all hutches to find and change serial no
         if verbose:
             print("Checking hutch(es) for all {0} objects with old SN\n".format(objType))
-        for hutch in hutches:
+        def findHutchSN(hutch):
             pmgr = utlp.getPmgr(objType, hutch, verbose)
-            if not pmgr: continue
+            if not pmgr: return None, None
             # Look for obj (default is ims_motor type) with previous serial no
-            objID = utlp.getObjWithSN(pmgr, oldSN, verbose)
-            if not objID: continue 
+            return pmgr, utlp.getObjWithSN(pmgr, oldSN, verbose)
+        def changeHutchSN(hutch, pmgr, objID):
             print("Motor found: ObjID = {0}, hutch = {1}".format(objID, hutch.upper()))
             # Create simple dict to change SN, then do it
             objDict = {'FLD_SN':newSN}
@@ -570,12 +666,17 @@ def main():
             # Now printupdated SN for verification, and in case it was padded
             if output != "error" :
                 print("Motor SN successfully updated to {0}.\n".format(pmgr.objs[objID]['FLD_SN']))
+        hutches = sorted(hutches)
+        # Search the hutches at once, then change the SNs one at a time
+        for hutch, (pmgr, objID) in zip(hutches, 
+                                        forEachHutch(findHutchSN, hutches)):
+            if objID: changeHutchSN(hutch, pmgr, objID)
         exit()                            # Do not continue
 
     # Parse the PV input into full PV names, exit if none inputted
     if len(PVArguments) > 0: motorPVs = parsePVArguments(PVArguments)
     else:
-        if zenity: system("zenity --error --text='No PV inputted.  Try --help'")
+        if zenity: utlp.zenityFatal("No PV inputted.  Try --help")
         exit("No PV inputted.  Try --help")
 
     # Run some preliminary checks
@@ -583,17 +684,17 @@ def main():
     if arguments["--hutch"]: 
         hutches = [hutch.lower() for hutch in arguments["--hutch"].split(',')]
     else: hutches = []
-    hutches, objType, SNs = utlp.motorPrelimChecks(
-        motorPVs, hutches, objType, verbose)
+    hutches, _, objType, SNs = utlp.motorPrelimChecks(
+        motorPVs, hutches, None, objType, verbose)
     if not hutches or not objType or not SNs:
-        if zenity: system("zenity --error --text='Failed preliminary checks on hutch, PV and/or objType'")
+        if zenity: utlp.zenityFatal("Failed preliminary checks on hutch, PV and/or objType")
         exit("\nFailed preliminary checks on hutch, PV and/or objType\n")
 
     # Loop through each of the motorPVs
     for PV in motorPVs:
         # Print some motor info
         print("Motor PV:          {0}".format(PV))
-        m_DESC = pv.get(PV + ".DESC")
+        m_DESC = utlp.batchGet(PV, [".DESC"])[".DESC"]
         print("Motor description: {0}".format(m_DESC))
         if not SNs[PV]:
             print("Could not get SN for motor: {0}.".format(m_DESC))
@@ -611,7 +712,7 @@ def main():
                 print("Motor connected to PV:{0} is a dumb motor, must use \
 dmapply\n".format(PV))
                 if zenity:
-                    system("zenity --error --text='Error: Dumb motor detected'")
+                    utlp.zenityError("Error: Dumb motor detected")
 
         # Else if inputted dumb apply try apply routine for dumb motors
         elif arguments["dmapply"]:
@@ -621,20 +722,35 @@ dmapply\n".format(PV))
                 print("Motor connected to PV:{0} is a smart motor, must use \
 apply\n".format(PV))
                 if zenity:
-                    system("zenity --error --text='Error: Smart motor detected'")
+                    utlp.zenityError("Error: Smart motor detected")
 
-        # Else loop through the hutches and check for diff and save 
+        # Else go through the hutches and check for diff and save 
         else:
-            for hutch in hutches:
-                pmgr = utlp.getPmgr(objType, hutch, verbose)
-                if not pmgr: continue
-                if arguments["diff"]:
-                    Diff(PV, hutch, pmgr, SN, verbose)
-                    continue
-                if arguments["save"]:
-                    saveConfig(PV, hutch, pmgr, SN, verbose, zenity, 
-                               rename=rename)
-                    continue
+            # Open the hutch pmgrs at once; getPmgr keeps them for later PVs
+            pmgrs = forEachHutch(
+                lambda hutch: utlp.getPmgr(objType, hutch, verbose), hutches)
+            pmgrs = dict((hutch, pmgr) for hutch, pmgr in zip(hutches, pmgrs) 
+                         if pmgr)
+            if not pmgrs: continue
+            # Read the motor once here rather than once for every hutch.
+            # The fields are the same in every hutch pmgr for the objType.
+            liveVals = utlp.getLiveVals(next(iter(pmgrs.values())), PV)
+            if arguments["diff"]:
+                forEachHutch(lambda hutch: Diff(PV, hutch, pmgrs[hutch], SN, 
+                                                verbose, liveVals), list(pmgrs))
+                continue
+            if not arguments["save"]: continue
+            # The cfg table, with its unique names and types, is shared by
+            # every hutch, so save one hutch at a time to let each see the
+            # configs the one before it added.
+            saved = []
+            for hutch, pmgr in pmgrs.items():
+                if saveConfig(PV, hutch, pmgr, SN, verbose, zenity, 
+                              rename=rename, liveVals=liveVals):
+                    saved.append(hutch.upper())
+            if zenity and saved:
+                utlp.zenityInfo("Motor configuration successfully saved into "
+                                "{0} pmgr".format(", ".join(saved)))
 
 if __name__ == "__main__":
     main()
@@ -2,16 +2,20 @@
 # pmgrUtils. It is a mishmash of functions compiled into one script so it is
 # to refer to it only when trying to understand specific funtions in pmgrUtils.
 
-from os import system
 from configparser import SafeConfigParser
 import logging
 import subprocess
 import os
 import string
 import datetime
+import threading
+import time
+import atexit
+from contextlib import contextmanager
 
 from pprint import pprint
 import psp.Pv as pv
+import pyca
 
 from .pmgrobj import pmgrobj
 
@@ -27,29 +31,49 @@ supportedHutches = parser.get("pmgr", "supportedHutches")
 supportedObjTypes = parser.get("pmgr", "supportedObjTypes")
 
 nTries = 3                                # Number of attempts when using caget
+caTimeout = 1.0                           # Seconds to wait on a batch of cagets
+
+# Live PV values read so far, keyed by upper-case base PV and then PV suffix
+liveCache = {}
+
+# pmgr instances opened so far, keyed by (objType, hutch)
+pmgrCache = {}
+pmgrCacheLock = threading.Lock()
+pmgrKeyLocks = {}                         # One lock per key, held while opening
+
+# Shared zenity process that error notifications are written to
+zenityProc = None
+zenityLock = threading.Lock()
 
-def getCfgVals(pmgr, PV, rename=True):
-    """ Returns a dictionary of the live cfg fields associated with a PV """
+def getCfgVals(pmgr, PV, rename=True, vals=None):
+    """
+    Returns a dictionary of the live cfg fields associated with a PV. vals is
+    an optional dictionary of PV suffix : value as returned by getLiveVals, so
+    callers that already read the motor do not go back to channel access.
+    """
     PV = PV.upper()
+    if vals is None: vals = getLiveVals(pmgr, PV)
     configFields = listCfgFields(pmgr)
-    cfgDict = getFieldDict(pmgr, PV, configFields)
+    cfgDict = getFieldDict(pmgr, PV, configFields, vals)
 
     if rename:
-        name = None
-        try:
-            name = pv.get(PV +".DESC")
-        except:
+        name = vals.get(".DESC")
+        if name is None:
             name = "Unknown"
         cfgDict["name"] = name
         cfgDict["FLD_TYPE"] = "{0}_{1}".format(name, PV[:4])
 
     return cfgDict
 
-def getObjVals(pmgr, PV, rename=True):
-    """ Returns a dictionary of the live obj fields associated with a PV """
+def getObjVals(pmgr, PV, rename=True, vals=None):
+    """
+    Returns a dictionary of the live obj fields associated with a PV. vals is
+    used the same way as in getCfgVals.
+    """
     PV = PV.upper()
+    if vals is None: vals = getLiveVals(pmgr, PV)
     objectFields = listObjFields(pmgr)
-    objDict = getFieldDict(pmgr, PV, objectFields)
+    objDict = getFieldDict(pmgr, PV, objectFields, vals)
     objDict["rec_base"] = PV
     
     if rename:
@@ -215,14 +239,24 @@ zeros to ensure proper pmgr functionality.".format(pmgr.objs[objID]["name"]))
         print("Serial number {0} not found in {1} pmgr".format(SN,getHutch(pmgr).upper()))
     return None    
 
-def getFieldDict(pmgr, PV, fields):
+def getFieldDict(pmgr, PV, fields, vals=None):
+    """
+    Builds a dictionary of field : live value for the fields of PV. If vals
+    is not given, every field is read in a single batch with batchGet. Raises
+    RuntimeError naming the PVs that could not be read.
+    """
+    if vals is None:
+        vals = batchGet(PV, [pmgr.fldmap[field]["pv"] for field in fields
+                             if field != "FLD_TYPE"])
+    missing = [PV + pmgr.fldmap[field]["pv"] for field in fields
+               if field != "FLD_TYPE" and vals.get(pmgr.fldmap[field]["pv"]) is None]
+    if missing:
+        raise RuntimeError("Failed to read {0}".format(", ".join(missing)))
     fldDict = {}
     for field in fields:
         if field != "FLD_TYPE":
             pvExt = pmgr.fldmap[field]["pv"]
-            val = pv.get(PV + pvExt)
-            if val is None:
-                return None
+            val = vals[pvExt]
             fieldDict = pmgr.fldmap[field]
             if "enum" in fieldDict:
                 choices = fieldDict["enum"]
@@ -234,6 +268,87 @@ def getFieldDict(pmgr, PV, fields):
             fldDict[field] = val
     return fldDict
 
+def getLiveVals(pmgr, PV, extra=(".DESC", ".PORT")):
+    """
+    Reads every obj and cfg field of PV, along with the extra PV suffixes, in
+    one batch. Returns a dictionary of PV suffix : value that can be handed to
+    getCfgVals and getObjVals.
+    """
+    # pmgr.objflds holds both the obj and the cfg fields
+    suffixes = [field["pv"] for field in pmgr.objflds
+                if field["fld"] != "FLD_TYPE"]
+    return batchGet(PV, suffixes + list(extra))
+
+def batchGet(PV, suffixes, timeout=None):
+    """
+    Returns a dictionary of suffix : value for PV + suffix for every suffix in
+    suffixes. Instead of one blocking caget per field, all of the missing
+    values are requested at once and then waited on together, and whatever
+    did not arrive within timeout is requested again, up to nTries times.
+    Values are kept in liveCache so later calls for the same PV do not read
+    them again. Any value that still could not be read is None.
+    """
+    # This does not use utils.caget_async: that leaves connect_cb pointing at
+    # a callback that needs save_connect_cb, and importing utils pulls in Qt.
+    if timeout is None: timeout = caTimeout
+    PV = PV.upper()
+    cache = liveCache.setdefault(PV, {})
+    for i in range(nTries):
+        missing = [suffix for suffix in dict.fromkeys(suffixes)
+                   if suffix not in cache]
+        if not missing: break
+        _batchRead(PV, missing, timeout, cache)
+
+    return {suffix: cache.get(suffix) for suffix in suffixes}
+
+def _batchRead(PV, suffixes, timeout, cache):
+    """ Does one wave of batchGet, storing what arrives in cache """
+    chans = {}
+    for suffix in suffixes:
+        try:
+            chan = pv.Pv(PV + suffix)
+            chan.get_done = threading.Event()
+            chan.abandoned = False
+            chan.connect_cb = lambda isconn, c=chan: _batchConnect(c, isconn)
+            chan.getevt_cb = lambda e=None, c=chan: _batchGetDone(c, e)
+            chan.connect(-1.0)
+            chans[suffix] = chan
+        except (pyca.pyexc, pyca.caexc) as e:
+            print("channel access exception: {0}".format(e))
+    pyca.flush_io()
+
+    deadline = time.time() + timeout
+    for suffix, chan in chans.items():
+        if chan.get_done.wait(max(deadline - time.time(), 0)):
+            cache[suffix] = chan.value
+        # Stop a late connection from starting a get on a closed channel
+        chan.abandoned = True
+        try: chan.disconnect()
+        except (pyca.pyexc, pyca.caexc): pass
+    pyca.flush_io()
+
+def _batchConnect(chan, isconn):
+    if isconn and not chan.abandoned:
+        try:
+            chan.get(ctrl=False, timeout=-1.0)
+            pyca.flush_io()
+        except (pyca.pyexc, pyca.caexc):
+            pass
+
+def _batchGetDone(chan, e):
+    if e is None:
+        chan.get_done.set()
+
+def clearLiveCache(PV=None):
+    """
+    Forgets the cached live values of PV (or of every PV) so the next read
+    goes back to the motor, e.g. after a configuration has been applied.
+    """
+    if PV is None:
+        liveCache.clear()
+    else:
+        liveCache.pop(PV.upper(), None)
+
 def objChange(pmgr, idx, objd):
     return transaction_bool(pmgr, "objectChange", idx, objd)
 
@@ -417,11 +532,12 @@ def updateConfig(PV, pmgr, objID, cfgID, objDict, cfgDict, allNames, verbose,
 
     # Print live values for troubleshooting
     if verbose:
-        print("\nLive cfg values for {0}".format(pv.get(PV+".DESC")))
+        desc = batchGet(PV, [".DESC"])[".DESC"]
+        print("\nLive cfg values for {0}".format(desc))
         pprint(objDict)
         pprint(cfgDict)
 
-        print("\nPMGR cfg values for {0} before update".format(pv.get(PV+".DESC")))
+        print("\nPMGR cfg values for {0} before update".format(desc))
         pprint(objOld)
         pprint(cfgOld)
         print
@@ -442,17 +558,14 @@ def updateConfig(PV, pmgr, objID, cfgID, objDict, cfgDict, allNames, verbose,
 
     return didWork, objOld, cfgOld
 
-def motorPrelimChecks(PV, hutches, objType, verbose=False):
+def checkHutches(PV, hutches, verbose=False):
     """
-    Runs preliminary checks on the parameter manager inputs, and returns a 
-    valid hutch name, and serial number. Returns false
-    for any of the variables if there are any issues when obtaining them.
+    Returns the list of valid hutches, defaulting to the hutch of the first PV
+    and replacing sxd with amo and sxr.
     """
-    SN = False
-    
     # Check for valid hutch entry
     if not hutches: hutches.append(PV[0][:3].lower())
-    for hutch in hutches:
+    for hutch in list(hutches):
         if hutch not in supportedHutches:
             print("Invalid hutch: {0}.".format(hutch.upper()))
             print("Removing hutch: {0}".format(hutch.upper()))
@@ -462,9 +575,25 @@ def motorPrelimChecks(PV, hutches, objType, verbose=False):
         if 'amo' not in hutches: hutches.append('amo')
         if 'sxr' not in hutches: hutches.append('sxr')
         hutches.remove('sxd')
-    if not hutches: return hutches, objType, SN
-    if verbose: 
+    if hutches and verbose: 
         print("Hutches: {0}".format(hutches))
+    return hutches
+
+def motorPrelimChecks(PV, hutches, hutchPaths, objType, verbose=False):
+    """
+    Runs preliminary checks on the parameter manager inputs, and returns the
+    valid hutches, hutch paths, object type and serial numbers. hutchPaths are
+    the hutch ims folders to import from, and are checked the same way as
+    hutches unless they are None. Returns false for any of the variables if
+    there are any issues when obtaining them.
+    """
+    SN = False
+
+    hutches = checkHutches(PV, hutches, verbose)
+    if not hutches: return hutches, hutchPaths, objType, SN
+    if hutchPaths is not None:
+        hutchPaths = checkHutches(PV, hutchPaths, verbose)
+        if not hutchPaths: return hutches, hutchPaths, objType, SN
 
     # Check for valid obj entry. Pmgr only supports ims motors as of 1/1/2016
     if str(objType) in supportedObjTypes: pass
@@ -472,7 +601,7 @@ def motorPrelimChecks(PV, hutches, objType, verbose=False):
     else:
         print("Unknown device type for {0}".format(PV[0]))
         objType = False
-        return hutches, objType, SN
+        return hutches, hutchPaths, objType, SN
 
     # Get the motor serial number via caget
     i = 0
@@ -489,7 +618,7 @@ def motorPrelimChecks(PV, hutches, objType, verbose=False):
             print("Failed to get motor serial number for motor {0}".format(motorPV))
             continue
 
-    return hutches, objType, SN
+    return hutches, hutchPaths, objType, SN
     # Wherever the function is called needs to have a check that ensures none of
     # the return values are None
 
@@ -520,6 +649,37 @@ def listObjFields(pmgr):
     return fields    
 
 
+@contextmanager
+def batched_updates(pmgr):
+    """
+    Context manager that keeps pmgr.updateTables from rereading the database
+    until the block exits, at which point the tables are refreshed once. Use
+    refreshTables inside the block for reads that must see earlier changes.
+    """
+    pmgr.defer_updates += 1
+    try:
+        yield pmgr
+    finally:
+        pmgr.defer_updates -= 1
+        if not pmgr.defer_updates and pmgr.pending_updates:
+            mask = pmgr.pending_updates
+            pmgr.pending_updates = 0
+            pmgr.updateTables(mask)
+
+def refreshTables(pmgr, mask=None):
+    """
+    Rereads the pmgr tables given by mask (all of them by default) even inside
+    a batched_updates block.
+    """
+    if mask is None: mask = pmgr.DB_ALL
+    deferred = pmgr.defer_updates
+    pmgr.defer_updates = 0
+    try:
+        pmgr.updateTables(mask)
+    finally:
+        pmgr.defer_updates = deferred
+    pmgr.pending_updates &= ~mask
+
 def get_all_SN(pmgr):
     """ Returns a list of all the motor SNs currently in the pmgr"""
     pmgr.updateTables()
@@ -532,15 +692,37 @@ def get_all_SN(pmgr):
 
 
 def getPmgr(objType, hutch, verbose):
-    """ Returns a pmgr obj for the inputted hutch and objType """
-    try:
-        pmgr = pmgrobj(objType, hutch.lower())  # Launch pmgr instance
-        pmgr.updateTables()                     # And update
-        if verbose: print("Pmgr instance initialized for hutch or area: {0}".format(hutch.upper()))
-    except:
-        print("Failed to create pmgr instance for hutch: {0}".format(hutch.upper()))
-        pmgr = None
-    return pmgr
+    """
+    Returns a pmgr obj for the inputted hutch and objType. The instance is kept
+    in pmgrCache and reused for the rest of the command, so the database
+    connection for each hutch is only opened once. A reused instance is not
+    refreshed here; the functions that read its tables already do that.
+    """
+    key = (objType, hutch.lower())
+    with pmgrCacheLock:
+        keyLock = pmgrKeyLocks.setdefault(key, threading.Lock())
+    # Only one thread opens each key, while different hutches open at once
+    with keyLock:
+        pmgr = pmgrCache.get(key)
+        if pmgr is not None:
+            return pmgr
+        try:
+            pmgr = pmgrobj(objType, hutch.lower())  # Launch pmgr instance
+            pmgr.updateTables()                     # And update
+            if verbose: print("Pmgr instance initialized for hutch or area: {0}".format(hutch.upper()))
+        except:
+            print("Failed to create pmgr instance for hutch: {0}".format(hutch.upper()))
+            return None
+        with pmgrCacheLock:
+            pmgrCache[key] = pmgr
+        return pmgr
+
+@atexit.register
+def _closePmgrs():
+    for pmgr in list(pmgrCache.values()):
+        try: pmgr.con.close()
+        except Exception: pass
+    pmgrCache.clear()
 
 def printDiff(pmgr, objOld, cfgOld, objNew, cfgNew, verbose, kind='diffs',
               **kwargs):
@@ -572,7 +754,7 @@ def printDiff(pmgr, objOld, cfgOld, objNew, cfgNew, verbose, kind='diffs',
                 diffs[field] = "{0}: {1:<20}  {2}: {3:<20}".format(
                     name1, str(cfgNew[field]), name2, str(cfgOld[field]))
                 ndiffs += 1
-        except: pass
+        except KeyError: pass
 
     for field in objOld.keys():
         if field in exclude_fields:
@@ -586,7 +768,7 @@ def printDiff(pmgr, objOld, cfgOld, objNew, cfgNew, verbose, kind='diffs',
                 diffs[field] = "{0}: {1:<20}  {2}: {3:<20}".format(
                     name1, str(objNew[field]), name2, str(objOld[field]))
                 ndiffs += 1
-        except: pass
+        except KeyError: pass
 
     print("\nNumber of {0}: {1}".format(kind, ndiffs))
     if ndiffs > 0:
@@ -607,7 +789,7 @@ def getAndSetConfig(PV, pmgr, objID, objDict, cfgDict, zenity=False):
 
     if not cfgID: 
         print("Failed to create cfg for {0}".format(cfgName))
-        if zenity: system("zenity --error --text='Error: Failed to create new config'")
+        if zenity: zenityError("Error: Failed to create new config")
         return status
 
     # Set obj to use cfg
@@ -639,7 +821,7 @@ def getMostRecentObj(hutches, SN, objType, verbose, zenity=False):
     # Make sure there is at least one obj with the corresponding SN
     if len(objs) == 0:
         print("Failed: Serial number {0} not found in pmgr".format(SN))
-        if zenity: system("zenity --error --text='Error: Motor not in pmgr'")
+        if zenity: zenityError("Error: Motor not in pmgr")
         return None, None
 
     # Use the most recent obj and the corresponding pmgr instance
@@ -651,6 +833,52 @@ def getMostRecentObj(hutches, SN, objType, verbose, zenity=False):
     
     return objID, pmgr
 
+def zenityError(text):
+    """
+    Shows text as a zenity error notification. One zenity process listening on
+    its stdin is started the first time and reused afterwards, so each error
+    does not pay for starting a shell, zenity and GTK. The notification does
+    not wait for the user, so errors that end the run should use
+    zenityFatal instead.
+    """
+    global zenityProc
+    with zenityLock:
+        if zenityProc is None or zenityProc.poll() is not None:
+            try:
+                zenityProc = subprocess.Popen(
+                    ["zenity", "--notification", "--listen"],
+                    stdin=subprocess.PIPE, universal_newlines=True)
+            except OSError as e:
+                logger.debug("Failed to start zenity: %s", e)
+                return
+        try:
+            zenityProc.stdin.write("icon:error\nmessage:{0}\n".format(
+                " ".join(text.split())))
+            zenityProc.stdin.flush()
+        except (OSError, ValueError) as e:
+            logger.debug("Failed to send zenity notification: %s", e)
+
+def zenityFatal(text):
+    """ Shows text in a zenity error dialog and waits for it to be closed """
+    try:
+        subprocess.run(["zenity", "--error", "--text={0}".format(text)])
+    except OSError as e:
+        logger.debug("Failed to start zenity: %s", e)
+
+def zenityInfo(text):
+    """ Shows text in a zenity info dialog and waits for it to be closed """
+    try:
+        subprocess.run(["zenity", "--info", "--text={0}".format(text)])
+    except OSError as e:
+        logger.debug("Failed to start zenity: %s", e)
+
+@atexit.register
+def _closeZenity():
+    # zenity --listen exits once its stdin is closed
+    if zenityProc is not None:
+        try: zenityProc.stdin.close()
+        except (OSError, ValueError): pass
+
 def getBasePV(PVArguments):
     """
     Returns the first base PV found in the list of PVArguments. It looks for the 
@@ -48,7 +48,7 @@ that hutch (so long as it is already in the pmgr).
 """
 
 from docopt import docopt
-import sys, os
+import sys, os, re, subprocess
 from .pmgrAPI import pmgrAPI
 from pcdsutils.ext_scripts import get_hutch_name
 import psp.Pv as pv
@@ -65,43 +65,42 @@ def getBasePV(PVArguments):
         try:
             i = arg.rindex(":")
             return arg[:i+1]
-        except:
+        except ValueError:
             pass
     return None
         
+# A range of motor numbers, e.g. "SXR:EXP:MMS:01-05" or "14-16", and a
+# single motor number, e.g. "10".  Only ASCII digits, which int() accepts.
+rangeArg = re.compile(r'^(.*?)([0-9]{1,2})-([0-9]+)$')
+numberArg = re.compile(r'^[0-9]{1,2}$')
+
 def parsePVArguments(PVArguments):
     """
     Parses PV input arguments and returns a set of motor PVs that will have
     the pmgrUtil functions applied to.
     """
-    
-    PVs = set()
     if len(PVArguments) == 0: return None
     basePV = getBasePV(PVArguments)
     if not basePV: return None
+    PVs = set()
     for arg in PVArguments:
-        try:
-            if '-' in arg:
-                splitArgs = arg.split('-')
-                if getBasePV(splitArgs[0]) == basePV: PVs.add(splitArgs[0])
-                start = int(splitArgs[0][-2:])
-                end = int(splitArgs[1])
-                while start <= end:
-                    PVs.add(basePV + "{:02}".format(start))
-                    start += 1
-            elif len(arg) > 3:
-                if getBasePV(arg) == basePV: PVs.add(arg)
-            elif len(arg) < 3:
-                PVs.add(basePV + "{:02}".format(int(arg)))
-            else: pass
-        except: pass
-        
-    PVs = list(PVs)
-    PVs.sort()
-    return PVs
+        match = rangeArg.match(arg)
+        if match:
+            # The range covers its first motor, so it is not added separately
+            start = int(match.group(2))
+            end = int(match.group(3))
+            PVs.update("{0}{1:02}".format(basePV, n)
+                       for n in range(start, end + 1))
+        elif '-' in arg: pass
+        elif len(arg) > 3:
+            if getBasePV(arg) == basePV: PVs.add(arg)
+        elif numberArg.match(arg):
+            PVs.add(basePV + "{:02}".format(int(arg)))
+
+    return sorted(PVs)
 
 def message(z, d, msg, abort=True):
-    if z: os.system("zenity --width 500 --%s --text='%s'" % (d, msg))
+    if z: subprocess.run(["zenity", "--width", "500", "--%s" % d, "--text=%s" % msg])
     if abort:
         exit(msg)
     else:
@@ -198,6 +198,8 @@ class pmgrobj(object):
         self.errorlist = []
         self.autoconfig = None
         self.in_trans = False
+        self.defer_updates = 0
+        self.pending_updates = 0
         if prod:
             print("Using production server.")
             self.con = mdb.connect('psdb', 'pscontrols', 'pcds', 'pscontrols')
@@ -463,9 +465,22 @@ class pmgrobj(object):
         mask : int
             A bit mask of DB_CONFIG and DB_OBJECT indicating which tables
             should be read.  (Defaults to all tables.)
+
+        defer_updates is only used by the command line scripts in
+        OBSOLETE (see utilsPlus.batched_updates); the GUI never sets it.
+        While it is non-zero, no table is read, 0 is returned, and the
+        mask is saved in pending_updates to be read later.
+
+        Returns
+        -------
+        mask : int
+            A bit mask of the tables that were actually read.
         """
         if self.in_trans:                    # This shouldn't happen.  But let's be paranoid.
             return
+        if self.defer_updates:
+            self.pending_updates |= mask
+            return 0
         if (mask & self.DB_CONFIG) != 0:
             cfgs = self.readDB(self.DB_CONFIG)
             if cfgs == []: